@@ -5,10 +5,52 @@ Fix timestamps in all issues by correctly reading from event log.
 This script fixes the bug where 'event_type' was used instead of 'type'.
 """
 
+import io
 import json
+import os
+import stat
 import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
 from pathlib import Path
 from datetime import datetime
+from typing import Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib parser
+    orjson = None
+
+def json_loads(data: bytes):
+    """Parse JSON bytes, preferring orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps_pretty(obj) -> bytes:
+    """Serialize obj as 2-space indented UTF-8 JSON, matching jit's own output."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+def write_json_atomic(path: str, obj):
+    """
+    Write obj as pretty JSON in one write, atomically.
+    
+    Like jit's own storage, the data goes to a temp file in the same
+    directory which is then renamed over the target.
+    """
+    buf = json_dumps_pretty(obj) + b'\n'
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.json.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(buf)
+        os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
 
 def load_events(events_file: Path) -> list:
     """Load all events from events.jsonl."""
@@ -16,26 +58,93 @@ def load_events(events_file: Path) -> list:
     if not events_file.exists():
         return events
     
-    with open(events_file, 'r') as f:
+    with open(events_file, 'rb') as f:
         for line in f:
-            line = line.strip()
-            if line:
+            if line.strip():
                 try:
-                    events.append(json.loads(line))
+                    events.append(json_loads(line))
                 except json.JSONDecodeError as e:
                     print(f"Warning: Failed to parse event: {e}", file=sys.stderr)
     return events
 
-def fix_issue_timestamps(issue_file: Path, events: list, dry_run: bool = False) -> bool:
+def build_index(events: list) -> dict:
+    """
+    Index events by issue in a single pass.
+
+    Returns:
+        {issue_id: {"first": ts, "last": ts, "created": ts or None}}
+    """
+    index = {}
+    for event in events:
+        issue_id = event.get('issue_id')
+        if not issue_id:
+            continue
+        timestamp = event.get('timestamp')
+        entry = index.get(issue_id)
+        if entry is None:
+            entry = index[issue_id] = {'first': timestamp, 'last': timestamp, 'created': None}
+        else:
+            entry['last'] = timestamp
+        if entry['created'] is None and event.get('type') == 'issue_created':
+            entry['created'] = timestamp
+    return index
+
+# Side-file recording issue files already verified against the current event log
+CACHE_FILE_NAME = '.timestamp_fix_cache.json'
+
+def load_cache(cache_file: Path, events_mtime_ns: Optional[int]) -> dict:
+    """
+    Load the {issue file name: mtime_ns} cache written by a previous run.
+    
+    The whole cache is discarded when events.jsonl has changed, since new
+    events can change the expected timestamps of an untouched issue file.
+    A missing, unreadable or malformed cache file counts as empty.
+    """
+    try:
+        with open(cache_file, 'rb') as f:
+            data = json_loads(f.read())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get('events_mtime_ns') != events_mtime_ns:
+        return {}
+    issues = data.get('issues')
+    return issues if isinstance(issues, dict) else {}
+
+def save_cache(cache_file: Path, events_mtime_ns: Optional[int], cache: dict):
+    """Write the cache, stamped with the mtime of the events.jsonl it was verified against."""
+    data = {'events_mtime_ns': events_mtime_ns, 'issues': cache}
+    with open(cache_file, 'wb') as f:
+        f.write(json_dumps_pretty(data))
+        f.write(b'\n')
+
+def get_mtime_ns(path: Path) -> Optional[int]:
+    """Get a file's mtime in nanoseconds, or None if it does not exist."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def fix_issue_timestamps(issue_file: str, index: dict, dry_run: bool = False,
+                         cache: Optional[dict] = None) -> bool:
     """
     Fix timestamps for a single issue by reading from event log.
     
+    When a cache is given, files whose mtime matches their cached entry are
+    skipped without being opened, and verified or fixed files are recorded.
+    
     Returns:
         True if issue was modified, False otherwise
     """
+    # Skip files unchanged since a previous run verified them
+    if cache is not None:
+        cache_key = os.path.basename(issue_file)
+        mtime_ns = os.stat(issue_file).st_mtime_ns
+        if cache.get(cache_key) == mtime_ns:
+            return False
+    
     # Load issue
-    with open(issue_file, 'r') as f:
-        issue = json.load(f)
+    with open(issue_file, 'rb') as f:
+        issue = json_loads(f.read())
     
     issue_id = issue.get('id')
     if not issue_id:
@@ -50,16 +159,16 @@ def fix_issue_timestamps(issue_file: Path, events: list, dry_run: bool = False)
         print(f"  {issue_id[:8]}: No timestamps, skipping")
         return False
     
-    # Find all events for this issue
-    issue_events = [e for e in events if e.get('issue_id') == issue_id]
+    # Look up this issue's events in the index
+    entry = index.get(issue_id)
     
-    if not issue_events:
+    if not entry:
         print(f"  {issue_id[:8]}: No events found, keeping current timestamps")
         return False
     
     # Get timestamps from events (first and last)
-    first_timestamp = issue_events[0].get('timestamp')
-    last_timestamp = issue_events[-1].get('timestamp')
+    first_timestamp = entry['first']
+    last_timestamp = entry['last']
     
     if not first_timestamp or not last_timestamp:
         print(f"  {issue_id[:8]}: Events missing timestamps, skipping")
@@ -67,6 +176,8 @@ def fix_issue_timestamps(issue_file: Path, events: list, dry_run: bool = False)
     
     # Check if we need to update
     if old_created == first_timestamp and old_updated == last_timestamp:
+        if cache is not None:
+            cache[cache_key] = mtime_ns
         return False  # Already correct
     
     if dry_run:
@@ -80,15 +191,46 @@ def fix_issue_timestamps(issue_file: Path, events: list, dry_run: bool = False)
     issue['updated_at'] = last_timestamp
     
     # Write back
-    with open(issue_file, 'w') as f:
-        json.dump(issue, f, indent=2)
-        f.write('\n')
+    write_json_atomic(issue_file, issue)
+    
+    if cache is not None:
+        cache[cache_key] = os.stat(issue_file).st_mtime_ns
     
     print(f"  {issue_id[:8]}: ✓ Fixed timestamps")
     print(f"    created_at: {first_timestamp}")
     print(f"    updated_at: {last_timestamp}")
     return True
 
+# Per-process state for the worker pool, set once by _init_worker
+_worker_index = None
+_worker_dry_run = False
+_worker_cache = None
+
+def _init_worker(index: dict, dry_run: bool, cache: dict):
+    """Receive the event index and cache once per worker instead of once per task."""
+    global _worker_index, _worker_dry_run, _worker_cache
+    _worker_index = index
+    _worker_dry_run = dry_run
+    _worker_cache = cache
+
+def _fix_worker(issue_file: str) -> Tuple[bool, str, str, Optional[int], Optional[str]]:
+    """
+    Run fix_issue_timestamps in a pool worker, capturing its output for ordered replay.
+    
+    Also returns the file's cache entry so main can assemble the updated cache,
+    and any exception as a message so one bad file cannot abort the other tasks
+    while their output is discarded.
+    """
+    out, err = io.StringIO(), io.StringIO()
+    modified, error = False, None
+    with redirect_stdout(out), redirect_stderr(err):
+        try:
+            modified = fix_issue_timestamps(issue_file, _worker_index, _worker_dry_run, _worker_cache)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+    mtime_ns = _worker_cache.get(os.path.basename(issue_file))
+    return modified, out.getvalue(), err.getvalue(), mtime_ns, error
+
 def main():
     dry_run = '--dry-run' in sys.argv
     
@@ -103,17 +245,24 @@ def main():
     
     issues_dir = jit_dir / 'issues'
     events_file = jit_dir / 'events.jsonl'
+    cache_file = jit_dir / CACHE_FILE_NAME
     
     if not issues_dir.exists():
         print("Error: .jit/issues directory not found", file=sys.stderr)
         sys.exit(1)
     
+    # Stamp the cache with the log as loaded, not as it is after the run
+    events_mtime_ns = get_mtime_ns(events_file)
+    
     print(f"Loading events from {events_file}...")
     events = load_events(events_file)
     print(f"Loaded {len(events)} events")
+    index = build_index(events)
+    cache = load_cache(cache_file, events_mtime_ns)
     
     print(f"\nScanning issues in {issues_dir}...")
-    issue_files = list(issues_dir.glob('*.json'))
+    with os.scandir(issues_dir) as entries:
+        issue_files = sorted(e.path for e in entries if e.name.endswith('.json'))
     print(f"Found {len(issue_files)} issue files")
     
     if dry_run:
@@ -122,12 +271,30 @@ def main():
         print("\n⚠️  LIVE MODE - Files will be modified\n")
     
     modified_count = 0
-    for issue_file in sorted(issue_files):
-        if fix_issue_timestamps(issue_file, events, dry_run):
-            modified_count += 1
+    failed = []
+    new_cache = {}
+    with ProcessPoolExecutor(initializer=_init_worker, initargs=(index, dry_run, cache)) as executor:
+        results = executor.map(_fix_worker, issue_files, chunksize=32)
+        for issue_file, (modified, out, err, mtime_ns, error) in zip(issue_files, results):
+            sys.stdout.write(out)
+            sys.stderr.write(err)
+            if error:
+                print(f"Error: Failed to process {issue_file}: {error}", file=sys.stderr)
+                failed.append(issue_file)
+            if modified:
+                modified_count += 1
+            if mtime_ns is not None:
+                new_cache[os.path.basename(issue_file)] = mtime_ns
+    
+    if not dry_run:
+        save_cache(cache_file, events_mtime_ns, new_cache)
     
     print(f"\n{'Would fix' if dry_run else 'Fixed'} {modified_count}/{len(issue_files)} issues")
     
+    if failed:
+        print(f"\n❌ {len(failed)} issue file(s) could not be processed", file=sys.stderr)
+        sys.exit(1)
+    
     if dry_run:
         print("\nRun without --dry-run to apply changes")
     else:
@@ -5,19 +5,60 @@ Migrate all existing issues to include created_at and updated_at timestamps.
 This script:
 1. Reads events.jsonl to extract timestamps from event log
 2. Falls back to file modification time if no events found
-3. Updates all issue JSON files with timestamps
+3. Updates issue JSON files that are missing timestamps
 4. Preserves all other issue data unchanged
 
 Usage: python3 scripts/migrate_timestamps.py [--dry-run]
 """
 
+import io
 import json
+import stat
 import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Dict, Tuple
 import os
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib parser
+    orjson = None
+
+def json_loads(data: bytes):
+    """Parse JSON bytes, preferring orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps_pretty(obj) -> bytes:
+    """Serialize obj as 2-space indented UTF-8 JSON, matching jit's own output."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+def write_json_atomic(path: str, obj):
+    """
+    Write obj as pretty JSON in one write, atomically.
+    
+    Like jit's own storage, the data goes to a temp file in the same
+    directory which is then renamed over the target.
+    """
+    buf = json_dumps_pretty(obj) + b'\n'
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.json.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(buf)
+        os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
 # RFC 3339 format for timestamps
 def to_rfc3339(dt: datetime) -> str:
     """Convert datetime to RFC 3339 format."""
@@ -29,82 +70,107 @@ def load_events(events_file: Path) -> list:
     if not events_file.exists():
         return events
     
-    with open(events_file, 'r') as f:
+    with open(events_file, 'rb') as f:
         for line in f:
-            line = line.strip()
-            if line:
+            if line.strip():
                 try:
-                    events.append(json.loads(line))
+                    events.append(json_loads(line))
                 except json.JSONDecodeError as e:
                     print(f"Warning: Failed to parse event: {e}", file=sys.stderr)
     return events
 
-def find_timestamps_from_events(issue_id: str, events: list) -> Tuple[Optional[str], Optional[str]]:
+def build_index(events: list) -> dict:
+    """
+    Index events by issue in a single pass.
+
+    Returns:
+        {issue_id: {"first": ts, "last": ts, "created": ts or None}}
+    """
+    index = {}
+    for event in events:
+        issue_id = event.get('issue_id')
+        if not issue_id:
+            continue
+        timestamp = event.get('timestamp')
+        entry = index.get(issue_id)
+        if entry is None:
+            entry = index[issue_id] = {'first': timestamp, 'last': timestamp, 'created': None}
+        else:
+            entry['last'] = timestamp
+        if entry['created'] is None and event.get('type') == 'issue_created':
+            entry['created'] = timestamp
+    return index
+
+def find_timestamps_from_events(issue_id: str, index: dict) -> Tuple[Optional[str], Optional[str]]:
     """
     Find created_at and updated_at from event log for given issue.
     
     Returns:
         (created_at, updated_at) tuple or (None, None) if not found
     """
-    created_at = None
-    updated_at = None
+    entry = index.get(issue_id)
     
-    # Filter events for this issue
-    issue_events = [e for e in events if e.get('issue_id') == issue_id]
-    
-    if not issue_events:
+    if not entry:
         return None, None
     
-    # Find issue_created event for created_at
-    for event in issue_events:
-        if event.get('type') == 'issue_created':
-            created_at = event.get('timestamp')
-            break
-    
-    # Most recent event timestamp for updated_at
-    # Events are in chronological order (append-only log)
-    if issue_events:
-        updated_at = issue_events[-1].get('timestamp')
-    
-    return created_at, updated_at
+    # created_at comes from the issue_created event; updated_at from the most
+    # recent event (events are in chronological order, append-only log)
+    return entry['created'], entry['last']
+
+@lru_cache(maxsize=None)
+def _fmt_mtime(mtime: float) -> str:
+    """Format an mtime once; a fresh checkout gives many files the same mtime."""
+    return to_rfc3339(datetime.fromtimestamp(mtime))
 
-def get_file_mtime_rfc3339(file_path: Path) -> str:
+def get_file_mtime_rfc3339(file_path: str) -> str:
     """Get file modification time as RFC 3339 timestamp."""
-    mtime = os.path.getmtime(file_path)
-    dt = datetime.fromtimestamp(mtime)
-    return to_rfc3339(dt)
+    return _fmt_mtime(os.stat(file_path).st_mtime)
 
-def migrate_issue(issue_file: Path, events: list, dry_run: bool = False) -> bool:
+# Top-level timestamp keys as jit pretty-prints them (nested keys sit deeper)
+CREATED_AT_KEY = b'\n  "created_at":'
+UPDATED_AT_KEY = b'\n  "updated_at":'
+
+def migrate_issue(issue_file: str, index: dict, dry_run: bool = False) -> bool:
     """
     Migrate a single issue file to include timestamps.
     
+    Issues that already have both timestamps are left untouched.
+    
     Returns:
         True if issue was modified, False otherwise
     """
+    with open(issue_file, 'rb') as f:
+        data = f.read()
+    
+    # Already-migrated files are recognized by a byte probe without parsing
+    if CREATED_AT_KEY in data and UPDATED_AT_KEY in data:
+        return False
+    
     # Load issue
-    with open(issue_file, 'r') as f:
-        issue = json.load(f)
+    issue = json_loads(data)
     
     issue_id = issue.get('id')
     if not issue_id:
         print(f"Warning: Issue {issue_file} has no ID, skipping", file=sys.stderr)
         return False
     
-    # Check if already has timestamps
-    has_timestamps = 'created_at' in issue and 'updated_at' in issue
+    # Check if already has timestamps (covers files not laid out the way jit writes them)
+    if 'created_at' in issue and 'updated_at' in issue:
+        return False
     
     # Try to get timestamps from events
-    created_at, updated_at = find_timestamps_from_events(issue_id, events)
+    created_at, updated_at = find_timestamps_from_events(issue_id, index)
     
     # Fallback to file mtime
-    file_timestamp = get_file_mtime_rfc3339(issue_file)
-    
-    if not created_at:
-        created_at = file_timestamp
-        print(f"  {issue['id'][:8]}: Using file mtime for created_at")
-    
-    if not updated_at:
-        updated_at = file_timestamp
+    if not created_at or not updated_at:
+        file_timestamp = get_file_mtime_rfc3339(issue_file)
+        
+        if not created_at:
+            created_at = file_timestamp
+            print(f"  {issue['id'][:8]}: Using file mtime for created_at")
+        
+        if not updated_at:
+            updated_at = file_timestamp
     
     # Ensure created_at <= updated_at (use earlier for created, later for updated)
     from datetime import datetime
@@ -127,13 +193,37 @@ def migrate_issue(issue_file: Path, events: list, dry_run: bool = False) -> bool
         return True
     
     # Write back
-    with open(issue_file, 'w') as f:
-        json.dump(issue, f, indent=2)
-        f.write('\n')  # Trailing newline for consistency
+    write_json_atomic(issue_file, issue)
     
     print(f"  {issue['id'][:8]}: ✓ Added timestamps")
     return True
 
+# Per-process state for the worker pool, set once by _init_worker
+_worker_index = None
+_worker_dry_run = False
+
+def _init_worker(index: dict, dry_run: bool):
+    """Receive the event index once per worker instead of once per task."""
+    global _worker_index, _worker_dry_run
+    _worker_index = index
+    _worker_dry_run = dry_run
+
+def _migrate_worker(issue_file: str) -> Tuple[bool, str, str, Optional[str]]:
+    """
+    Run migrate_issue in a pool worker, capturing its output for ordered replay.
+    
+    Any exception is returned as a message so one bad file cannot abort the
+    other tasks while their output is discarded.
+    """
+    out, err = io.StringIO(), io.StringIO()
+    modified, error = False, None
+    with redirect_stdout(out), redirect_stderr(err):
+        try:
+            modified = migrate_issue(issue_file, _worker_index, _worker_dry_run)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+    return modified, out.getvalue(), err.getvalue(), error
+
 def main():
     dry_run = '--dry-run' in sys.argv
     
@@ -157,9 +247,11 @@ def main():
     print(f"Loading events from {events_file}...")
     events = load_events(events_file)
     print(f"Loaded {len(events)} events")
+    index = build_index(events)
     
     print(f"\nScanning issues in {issues_dir}...")
-    issue_files = list(issues_dir.glob('*.json'))
+    with os.scandir(issues_dir) as entries:
+        issue_files = sorted(e.path for e in entries if e.name.endswith('.json'))
     print(f"Found {len(issue_files)} issue files")
     
     if dry_run:
@@ -168,12 +260,24 @@ def main():
         print("\n⚠️  LIVE MODE - Files will be modified\n")
     
     modified_count = 0
-    for issue_file in sorted(issue_files):
-        if migrate_issue(issue_file, events, dry_run):
-            modified_count += 1
+    failed = []
+    with ProcessPoolExecutor(initializer=_init_worker, initargs=(index, dry_run)) as executor:
+        results = executor.map(_migrate_worker, issue_files, chunksize=32)
+        for issue_file, (modified, out, err, error) in zip(issue_files, results):
+            sys.stdout.write(out)
+            sys.stderr.write(err)
+            if error:
+                print(f"Error: Failed to process {issue_file}: {error}", file=sys.stderr)
+                failed.append(issue_file)
+            if modified:
+                modified_count += 1
     
     print(f"\n{'Would modify' if dry_run else 'Modified'} {modified_count}/{len(issue_files)} issues")
     
+    if failed:
+        print(f"\n❌ {len(failed)} issue file(s) could not be processed", file=sys.stderr)
+        sys.exit(1)
+    
     if dry_run:
         print("\nRun without --dry-run to apply changes")
     else: